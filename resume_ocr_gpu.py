@@ -1,14 +1,21 @@
 import os
+import re
 import sys
+import asyncio
+import argparse
+import hashlib
+import json
+import queue
+import threading
 import torch
 import fitz              # PyMuPDF
 import ollama            # pip install ollama
 import easyocr           # pip install easyocr
+import cv2               # redimensionamento uniforme para OCR em lote
 import numpy as np       # para converter PIL Image em numpy array
 import logging
-from PIL import Image
 from io import BytesIO
-from typing import List
+from typing import List, Optional
 
 # ----------------------------
 # Configuração de Logging
@@ -23,19 +30,180 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # ----------------------------
-# Inicialização do EasyOCR
+# Cliente Ollama compartilhado
 # ----------------------------
-try:
-    reader = easyocr.Reader(['en', 'pt'], gpu=torch.cuda.is_available())
-    logger.info("EasyOCR reader inicializado com sucesso.")
-except Exception as e:
-    logger.error(f"Falha ao inicializar EasyOCR: {e}")
-    sys.exit(1)
+# Um único Client reaproveita o pool de conexões keep-alive do httpx
+# entre todas as requisições, em vez de renegociar conexão a cada chat.
+_OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+_client = ollama.Client(host=_OLLAMA_HOST)
+
+# Modelos padrão: a decodificação é limitada por banda de memória, então
+# a variante q4_K_M praticamente dobra os tokens/s dos resumos por chunk;
+# a síntese final usa q8_0 para preservar a qualidade do texto.
+DEFAULT_MODEL = "gemma3:12b-it-q4_K_M"
+DEFAULT_SYNTHESIS_MODEL = "gemma3:12b-it-q8_0"
+
+# Mantém o modelo residente entre requisições (renovado a cada chamada);
+# o pré-carregamento usa -1 (fixado) e o descarte explícito usa 0.
+_KEEP_ALIVE = "30m"
+
+
+def _prewarm_model(model: str) -> None:
+    """
+    Força o carregamento do modelo na VRAM antes do primeiro chunk e o
+    fixa (keep_alive=-1), evitando o cold-start de 5-20 s na primeira
+    requisição real — e reaquecendo caso o Ollama o tenha descartado.
+    """
+    try:
+        _client.generate(model=model, prompt="", keep_alive=-1)
+        logger.info(f"Modelo {model} pré-carregado e fixado na VRAM.")
+    except Exception as e:
+        logger.warning(f"Falha ao pré-carregar {model}: {e}")
+
+
+def _unload_model(model: str) -> None:
+    """
+    Libera o modelo da VRAM ao fim do pipeline (keep_alive=0).
+    """
+    try:
+        _client.generate(model=model, prompt="", keep_alive=0)
+    except Exception:
+        pass
+
+# ----------------------------
+# Inicialização preguiçosa do EasyOCR
+# ----------------------------
+# Os modelos (~200 MB, carregados na VRAM) só são necessários quando
+# alguma página não tem texto nativo — o caso comum de PDFs digitais
+# nunca paga esse custo, e a VRAM fica livre para o modelo do Ollama.
+_reader = None
+
+
+def _get_reader() -> easyocr.Reader:
+    global _reader
+    if _reader is None:
+        _reader = easyocr.Reader(['en', 'pt'], gpu=torch.cuda.is_available())
+        logger.info("EasyOCR reader inicializado com sucesso.")
+    return _reader
+
+# ----------------------------
+# Cache em disco (OCR e texto por PDF)
+# ----------------------------
+_OCR_CACHE_DIR = os.path.join(".cache", "ocr")
+_TEXT_CACHE_DIR = os.path.join(".cache", "text")
+_LLM_CACHE_DIR = os.path.join(".cache", "llm")
+_OCR_LANG = "en+pt"
+# 200 dpi em tons de cinza: mesma acurácia para texto corrido com
+# ~3,4x menos bytes por página do que 300 dpi RGB
+_OCR_DPI = 200
+# altura-alvo enviada ao EasyOCR: o reconhecedor trabalha com linhas de
+# ~64 px, então páginas inteiras acima disso só gastam banda PCIe — o
+# detector opera bem com a página reduzida
+_OCR_TARGET_HEIGHT = 960
+
+# Incrementar sempre que o texto de algum prompt mudar, para invalidar
+# os resumos cacheados gerados com a versão anterior.
+PROMPT_REV = 2
+
+
+def _cache_read(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _cache_write(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _doc_cache_path(pdf_path: str) -> str:
+    """
+    Caminho do cache do texto extraído de um PDF, chaveado pelo hash do
+    arquivo mais a configuração de OCR (dpi e idiomas).
+    """
+    with open(pdf_path, "rb") as f:
+        file_bytes = f.read()
+    return os.path.join(
+        _TEXT_CACHE_DIR,
+        f"{hashlib.sha256(file_bytes).hexdigest()}_dpi{_OCR_DPI}_{_OCR_LANG}.json"
+    )
+
+
+def _doc_cache_load(path: str) -> Optional[tuple]:
+    """
+    Lê o cache estruturado do documento — {"native": {página: texto},
+    "ocr": {página: texto}} — preservando a classificação das páginas,
+    para que uma reexecução emita exatamente os mesmos chunks da
+    primeira execução. Retorna None se ausente ou ilegível.
+    """
+    raw = _cache_read(path)
+    if raw is None:
+        return None
+    try:
+        data = json.loads(raw)
+        native = {int(k): v for k, v in data["native"].items()}
+        ocr = {int(k): v for k, v in data["ocr"].items()}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+    return native, ocr
+
+
+def _doc_cache_store(path: str, native: dict, ocr: dict) -> None:
+    _cache_write(path, json.dumps({"native": native, "ocr": ocr}))
+
+
+def _chat_options(prompt: str, num_predict: int = 384) -> dict:
+    """
+    Opções de geração dimensionadas ao prompt: o num_ctx padrão do
+    Ollama (2048 tokens) truncaria silenciosamente chunks de 4000
+    chars, então o contexto cobre o prompt (~4 chars/token) mais a
+    resposta, com folga; num_predict limita o tamanho da saída, o que
+    encolhe o KV-cache e permite mais requisições simultâneas.
+    """
+    num_ctx = len(prompt) // 4 + num_predict + 256
+    return {
+        "num_ctx": num_ctx,
+        "num_predict": num_predict,
+        "temperature": 0.2,
+        "num_batch": 512,
+    }
+
+
+def _llm_cache_path(prompt: str, model: str) -> str:
+    """
+    Caminho do cache para uma resposta do Ollama: o prompt completo já
+    embute o trecho e o papel de cada etapa, então (prompt, model,
+    PROMPT_REV) identifica a resposta de forma única.
+    """
+    digest = hashlib.sha256(f"{model}|{PROMPT_REV}|{prompt}".encode("utf-8")).hexdigest()
+    return os.path.join(_LLM_CACHE_DIR, f"{digest}.txt")
+
 
 # ----------------------------
 # Funções principais
 # ----------------------------
 
+def _get_ocr_batch_size(default: int = 4) -> int:
+    """
+    Tamanho do lote do EasyOCR, dimensionado pela VRAM disponível
+    (aprox. 1 página por GB, com folga para os modelos), limitado a 16.
+    """
+    if not torch.cuda.is_available():
+        return default
+    try:
+        total_mem_gb = torch.cuda.get_device_properties(0).total_memory / (1024 ** 3)
+        return max(1, min(int(total_mem_gb), 16))
+    except Exception as e:
+        logger.error(f"Falha ao obter propriedades da GPU: {e}")
+        return default
+
+
 def extract_text_from_pdf(pdf_path: str) -> str:
     """
     Extrai texto de cada página:
@@ -47,67 +215,208 @@ def extract_text_from_pdf(pdf_path: str) -> str:
         logger.error(f"Arquivo PDF não encontrado: {pdf_path}")
         return ""
 
+    doc_cache = _doc_cache_path(pdf_path)
+    cached = _doc_cache_load(doc_cache)
+    if cached is not None:
+        logger.info(f"Texto de {os.path.basename(pdf_path)} recuperado do cache.")
+        texts = dict(cached[0])
+        texts.update(cached[1])
+        return "\n\n".join(texts[n] for n in sorted(texts))
+
     try:
         doc = fitz.open(pdf_path)
     except Exception as e:
         logger.error(f"Erro ao abrir PDF: {e}")
         return ""
 
-    full_text = []
+    native, ocr_texts, pending = _extract_native(doc)
+    fresh, ocr_errors = _ocr_pending(pending)
+    ocr_texts.update(fresh)
+
+    texts = dict(native)
+    texts.update(ocr_texts)
+    result = "\n\n".join(texts[n] for n in sorted(texts))
+    # se alguma página falhou no OCR, o cache do documento não é gravado
+    # — a próxima execução tenta essas páginas de novo
+    if result and not ocr_errors:
+        _doc_cache_store(doc_cache, native, ocr_texts)
+    return result
+
+
+def _extract_native(doc, sink=None) -> tuple:
+    """
+    1ª etapa (rápida, CPU): texto nativo página a página; páginas sem
+    texto viram pixmaps pendentes de OCR. Retorna ({página: texto
+    nativo}, {página: texto do cache de OCR},
+    [(página, chave_cache, array, pixmap)]) — páginas de OCR ficam
+    separadas das nativas para que a classificação (e portanto o
+    chunking) seja a mesma com ou sem cache.
+
+    Com `sink` (uma queue.Queue limitada), cada página pendente é
+    enviada à fila assim que rasterizada, em vez de acumulada na lista
+    — permite que o OCR consuma em paralelo com a varredura.
+    """
+    texts = {}
+    ocr_cached_texts = {}
+    pending = []
     for page_num, page in enumerate(doc, start=1):
         text = page.get_text().strip()
         if text:
             logger.info(f"Página {page_num}: texto nativo extraído ({len(text)} chars).")
-            full_text.append(text)
+            texts[page_num] = text
+            continue
+
+        pix = page.get_pixmap(dpi=_OCR_DPI, colorspace=fitz.csGRAY)
+        # samples_mv é uma visão zero-cópia do buffer interno do pixmap
+        # (pix.samples faria mais uma cópia integral por página)
+        samples = pix.samples_mv
+        key = f"{hashlib.blake2b(samples, digest_size=16).hexdigest()}_{_OCR_LANG}"
+        ocr_cached = _cache_read(os.path.join(_OCR_CACHE_DIR, f"{key}.txt"))
+        if ocr_cached is not None:
+            if ocr_cached:
+                logger.info(f"Página {page_num}: texto via OCR recuperado do cache.")
+                ocr_cached_texts[page_num] = ocr_cached
+            else:
+                logger.warning(f"Página {page_num}: sem texto encontrado nem via OCR.")
             continue
 
-        # sem texto nativo → OCR
-        pix = page.get_pixmap(dpi=300)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        # converte PIL Image em array numpy para EasyOCR
-        img_array = np.array(img)
-        # easyocr retorna lista de strings (quando detail=0)
+        # o array compartilha o buffer do pixmap (readtext aceita arrays
+        # 2D em tons de cinza); o pixmap segue na tupla porque o MuPDF
+        # libera o buffer quando o pixmap é coletado
+        img_array = np.frombuffer(samples, dtype=np.uint8).reshape(pix.height, pix.width)
+        item = (page_num, key, img_array, pix)
+        if sink is not None:
+            sink.put(item)
+        else:
+            pending.append(item)
+
+    return texts, ocr_cached_texts, pending
+
+
+def _ocr_pending(pending) -> tuple:
+    """
+    2ª etapa (GPU): OCR em lote — páginas redimensionadas para dimensões
+    uniformes e enviadas numa única chamada, saturando a GPU. Retorna
+    ({página: texto} só com as páginas de texto reconhecido, houve_erro)
+    — o indicador distingue "OCR rodou e a página está vazia" de "o OCR
+    falhou", para que falhas não sejam persistidas como páginas ausentes.
+    """
+    texts = {}
+    had_errors = False
+    if pending:
+        n_height = max(arr.shape[0] for _, _, arr, _ in pending)
+        n_width = max(arr.shape[1] for _, _, arr, _ in pending)
+        # pré-redimensiona na CPU (cv2.resize despacha AVX2 no hal) em
+        # vez de transferir a página em 200 dpi para a GPU só para o
+        # EasyOCR reduzi-la internamente — 4-9x menos dados no barramento
+        if n_height > _OCR_TARGET_HEIGHT:
+            scale = _OCR_TARGET_HEIGHT / n_height
+            n_height = _OCR_TARGET_HEIGHT
+            n_width = max(1, int(n_width * scale))
+        imgs = [
+            arr if arr.shape[:2] == (n_height, n_width)
+            else cv2.resize(arr, (n_width, n_height), interpolation=cv2.INTER_AREA)
+            for _, _, arr, _ in pending
+        ]
+        batch_size = _get_ocr_batch_size()
+        logger.info(f"OCR em lote de {len(imgs)} páginas (batch_size={batch_size}).")
         try:
-            results = reader.readtext(
-                img_array,
+            # uma lista de resultados (detail=0) por imagem, na mesma ordem
+            results = _get_reader().readtext_batched(
+                imgs,
+                n_width=n_width,
+                n_height=n_height,
+                batch_size=batch_size,
                 detail=0,         # só o texto
                 paragraph=True    # junta linhas em parágrafo
             )
         except Exception as e:
-            logger.error(f"Erro no OCR da página {page_num}: {e}")
+            # falha no lote → tenta página a página para isolar o erro
+            logger.error(f"Erro no OCR em lote: {e}")
             results = []
-        ocr_text = "\n".join(results).strip()
-        if ocr_text:
-            logger.info(f"Página {page_num}: texto via OCR extraído ({len(ocr_text)} chars).")
-            full_text.append(ocr_text)
-        else:
-            logger.warning(f"Página {page_num}: sem texto encontrado nem via OCR.")
+            for (page_num, _, _, _), img in zip(pending, imgs):
+                try:
+                    results.append(_get_reader().readtext(img, detail=0, paragraph=True))
+                except Exception as e:
+                    logger.error(f"Erro no OCR da página {page_num}: {e}")
+                    results.append(None)
+
+        for (page_num, key, _, _), page_results in zip(pending, results):
+            if page_results is None:
+                had_errors = True
+                continue
+            ocr_text = "\n".join(page_results).strip()
+            # não cacheia falhas: erro transitório não deve virar página vazia
+            _cache_write(os.path.join(_OCR_CACHE_DIR, f"{key}.txt"), ocr_text)
+            if ocr_text:
+                logger.info(f"Página {page_num}: texto via OCR extraído ({len(ocr_text)} chars).")
+                texts[page_num] = ocr_text
+            else:
+                logger.warning(f"Página {page_num}: sem texto encontrado nem via OCR.")
 
-    return "\n\n".join(full_text)
+    return texts, had_errors
 
 
 def chunk_text(text: str, max_chars: int = 4000) -> List[str]:
     """
     Divide o texto em pedaços de até max_chars,
     respeitando quebras de parágrafo.
+
+    As posições de quebra são coletadas numa única varredura (O(N))
+    sobre o buffer UTF-8 — a busca em bytes usa o memmem vetorizado da
+    libc, bem mais rápido que a varredura sobre str. O limite passa a
+    valer em bytes UTF-8 (aproximadamente o nº de caracteres para texto
+    em português); parágrafos maiores que max_chars são cortados de
+    forma rígida, sem nunca partir um caractere multibyte.
     """
+    buf = text.encode("utf-8")
     chunks = []
-    start = 0
-    length = len(text)
-    while start < length:
-        end = start + max_chars
-        if end < length:
-            split = text.rfind("\n\n", start, end)
-            if split != -1:
-                end = split
-        chunk = text[start:end].strip()
-        if chunk:
-            chunks.append(chunk)
-        start = end
+
+    def append(piece):
+        piece = piece.strip()
+        if piece:
+            chunks.append(piece.decode("utf-8"))
+
+    breaks = [m.end() for m in re.finditer(rb"\n\n", buf)] + [len(buf)]
+    cur_start = 0
+    prev = 0
+    for b in breaks:
+        if b - cur_start > max_chars:
+            if prev > cur_start:
+                append(buf[cur_start:prev])
+                cur_start = prev
+            # parágrafo sozinho maior que max_chars → corte rígido
+            while b - cur_start > max_chars:
+                end = cur_start + max_chars
+                # recua até o início do caractere UTF-8 mais próximo
+                while buf[end] & 0xC0 == 0x80:
+                    end -= 1
+                append(buf[cur_start:end])
+                cur_start = end
+        prev = b
+    append(buf[cur_start:])
     return chunks
 
 
-def summarize_chunk(chunk: str, model: str = "gemma3:12b") -> str:
+def _get_summary_concurrency(default: int = 4) -> int:
+    """
+    Quantidade de chunks resumidos em paralelo no Ollama, limitada pela
+    VRAM disponível (aprox. 1 requisição por 3 GB) e por OLLAMA_NUM_PARALLEL.
+    """
+    if not torch.cuda.is_available():
+        return default
+    try:
+        total_mem_gb = torch.cuda.get_device_properties(0).total_memory / (1024 ** 3)
+        ideal = max(1, int(total_mem_gb // 3))
+        return min(ideal, int(os.environ.get("OLLAMA_NUM_PARALLEL", "8")))
+    except Exception as e:
+        logger.error(f"Falha ao obter propriedades da GPU: {e}")
+        return default
+
+
+async def summarize_chunk_async(client: ollama.AsyncClient, chunk: str,
+                                model: str = DEFAULT_MODEL,
+                                semaphore: asyncio.Semaphore = None) -> str:
     """
     Envia um chunk ao Ollama e retorna o resumo em português (norma culta).
     """
@@ -116,15 +425,34 @@ def summarize_chunk(chunk: str, model: str = "gemma3:12b") -> str:
         "Por favor, forneça um resumo conciso em língua portuguesa, seguindo a norma culta da gramática brasileira, do seguinte texto:\n\n"
         f"{chunk}"
     )
+    cache_path = _llm_cache_path(prompt, model)
+    cached = _cache_read(cache_path)
+    if cached is not None:
+        logger.info(f"Chunk recuperado do cache ({len(cached)} chars).")
+        return cached
+
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(1)
     try:
-        resp = ollama.chat(
-            model=model,
-            messages=[
-                {"role": "system", "content": "Você resume textos em português."},
-                {"role": "user",   "content": prompt}
-            ]
-        )
-        summary = resp["message"]["content"].strip()
+        async with semaphore:
+            # stream=True: os tokens são acumulados conforme chegam, em
+            # vez de bloquear a tarefa até o fim da geração
+            stream = await client.chat(
+                model=model,
+                messages=[
+                    {"role": "system", "content": "Você resume textos em português."},
+                    {"role": "user",   "content": prompt}
+                ],
+                stream=True,
+                keep_alive=_KEEP_ALIVE,
+                options=_chat_options(prompt)
+            )
+            buf = []
+            async for part in stream:
+                buf.append(part["message"]["content"])
+        summary = "".join(buf).strip()
+        if summary:
+            _cache_write(cache_path, summary)
         logger.info(f"Chunk resumido ({len(summary)} chars).")
         return summary
     except Exception as e:
@@ -132,7 +460,139 @@ def summarize_chunk(chunk: str, model: str = "gemma3:12b") -> str:
         return ""
 
 
-def synthesize_summaries(summaries: List[str], model: str = "gemma3:12b") -> str:
+async def _summarize_pdf_async(pdf_path: str, model: str,
+                               max_chars: int = 4000) -> List[str]:
+    """
+    Pipeline produtor/consumidor em três estágios sobrepostos: uma
+    thread rasteriza as páginas (CPU) e alimenta uma fila limitada; o
+    OCR (GPU) consome a fila em lotes enquanto a varredura continua; e
+    os chunks — das páginas OCR conforme cada lote termina, e do texto
+    nativo ao fim da varredura — seguem para os consumidores do Ollama.
+    A ordem de emissão é livre (quem termina primeiro, vai primeiro);
+    cada chunk carrega a posição no documento (primeira página do bloco,
+    índice do chunk) e os resumos são reordenados na coleta. As regras
+    de fronteira são determinísticas — texto nativo em blocos contíguos,
+    páginas de OCR uma a uma — e o cache do documento preserva essa
+    classificação, então uma reexecução emite exatamente os mesmos
+    chunks (e reaproveita o cache de respostas do Ollama por inteiro).
+    """
+    chunk_q: asyncio.Queue = asyncio.Queue(maxsize=16)
+    n_consumers = _get_summary_concurrency()
+    client = ollama.AsyncClient(host=_OLLAMA_HOST)
+    semaphore = asyncio.Semaphore(n_consumers)
+    results = {}
+
+    async def emit(text, first_page):
+        for idx, chunk in enumerate(chunk_text(text, max_chars)):
+            await chunk_q.put(((first_page, idx), chunk))
+
+    async def emit_pages(pages):
+        # emite blocos contíguos de páginas, chaveados pela primeira
+        # página de cada bloco — páginas não adjacentes nunca são
+        # coladas num mesmo chunk
+        run = []
+        for n in sorted(pages) + [None]:
+            if run and (n is None or n != run[-1] + 1):
+                await emit("\n\n".join(pages[p] for p in run), run[0])
+                run = []
+            if n is not None:
+                run.append(n)
+
+    async def emit_ocr_pages(pages):
+        # páginas de OCR são emitidas uma a uma: a fronteira de chunk
+        # fica no limite da página, independente de em qual lote (ou
+        # cache) o texto ficou pronto
+        for n in sorted(pages):
+            await emit(pages[n], n)
+
+    async def producer():
+        loop = asyncio.get_running_loop()
+        try:
+            if not os.path.isfile(pdf_path):
+                logger.error(f"Arquivo PDF não encontrado: {pdf_path}")
+                return
+            doc_cache = _doc_cache_path(pdf_path)
+            cached = _doc_cache_load(doc_cache)
+            if cached is not None:
+                logger.info(f"Texto de {os.path.basename(pdf_path)} recuperado do cache.")
+                # repete a mesma emissão da primeira execução
+                await emit_pages(cached[0])
+                await emit_ocr_pages(cached[1])
+                return
+            raster_q: queue.Queue = queue.Queue(maxsize=4)
+            native = {}
+            ocr_cached_pages = {}
+            ocr_texts = {}
+
+            def rasterize():
+                # a thread abre o próprio documento: fitz.Document não é
+                # seguro para acesso concorrente entre threads
+                try:
+                    doc = fitz.open(pdf_path)
+                except Exception as e:
+                    logger.error(f"Erro ao abrir PDF: {e}")
+                else:
+                    try:
+                        nat, ocr_cached, _ = _extract_native(doc, sink=raster_q)
+                        native.update(nat)
+                        ocr_cached_pages.update(ocr_cached)
+                    except Exception as e:
+                        logger.error(f"Erro na rasterização: {e}")
+                finally:
+                    raster_q.put(None)
+
+            thread = threading.Thread(target=rasterize, daemon=True)
+            thread.start()
+
+            batch = []
+            batch_size = _get_ocr_batch_size()
+            ocr_errors = False
+            done = False
+            while not done:
+                item = await loop.run_in_executor(None, raster_q.get)
+                if item is None:
+                    done = True
+                    # varredura completa: o texto nativo e as páginas
+                    # vindas do cache de OCR já podem fluir
+                    await emit_pages(native)
+                    await emit_ocr_pages(ocr_cached_pages)
+                    ocr_texts.update(ocr_cached_pages)
+                else:
+                    batch.append(item)
+                if batch and (done or len(batch) >= batch_size):
+                    # o OCR deste lote roda enquanto a thread rasteriza
+                    # as próximas páginas
+                    fresh, batch_errors = await loop.run_in_executor(
+                        None, _ocr_pending, batch)
+                    ocr_errors = ocr_errors or batch_errors
+                    await emit_ocr_pages(fresh)
+                    ocr_texts.update(fresh)
+                    batch = []
+            thread.join()
+            # se alguma página falhou no OCR, o cache do documento não é
+            # gravado — a próxima execução tenta essas páginas de novo
+            if (native or ocr_texts) and not ocr_errors:
+                _doc_cache_store(doc_cache, native, ocr_texts)
+        finally:
+            # sentinelas encerram os consumidores
+            for _ in range(n_consumers):
+                await chunk_q.put(None)
+
+    async def consumer():
+        while True:
+            item = await chunk_q.get()
+            if item is None:
+                break
+            pos, chunk = item
+            results[pos] = await summarize_chunk_async(
+                client, chunk, model=model, semaphore=semaphore)
+
+    await asyncio.gather(producer(), *[consumer() for _ in range(n_consumers)])
+    # reordena pela posição no documento, independente da ordem de emissão
+    return [results[pos] for pos in sorted(results) if results[pos]]
+
+
+def synthesize_summaries(summaries: List[str], model: str = DEFAULT_SYNTHESIS_MODEL) -> str:
     """
     Agrupa resumos parciais em um único resumo final em português (norma culta) em Markdown.
     """
@@ -143,15 +603,28 @@ def synthesize_summaries(summaries: List[str], model: str = "gemma3:12b") -> str
         "em língua portuguesa conforme a norma culta da gramática brasileira, no formato Markdown:\n\n"
         f"{joined}"
     )
+    cache_path = _llm_cache_path(prompt, model)
+    cached = _cache_read(cache_path)
+    if cached is not None:
+        logger.info("Síntese final recuperada do cache.")
+        return cached
+
     try:
-        resp = ollama.chat(
+        buf = []
+        for part in _client.chat(
             model=model,
             messages=[
                 {"role": "system", "content": "Você sintetiza múltiplos resumos em português."},
                 {"role": "user",   "content": prompt}
-            ]
-        )
-        final = resp["message"]["content"].strip()
+            ],
+            stream=True,
+            keep_alive=_KEEP_ALIVE,
+            options=_chat_options(prompt, num_predict=1024)
+        ):
+            buf.append(part["message"]["content"])
+        final = "".join(buf).strip()
+        if final:
+            _cache_write(cache_path, final)
         logger.info("Síntese final gerada.")
         return final
     except Exception as e:
@@ -159,23 +632,22 @@ def synthesize_summaries(summaries: List[str], model: str = "gemma3:12b") -> str
         return ""
 
 
-def main(pdf_path: str, output_path: str, model: str = "gemma3:12b"):
+def main(pdf_path: str, output_path: str, model: str = DEFAULT_MODEL,
+         synthesis_model: str = DEFAULT_SYNTHESIS_MODEL):
     logger.info("Iniciando processamento do PDF.")
-    text = extract_text_from_pdf(pdf_path)
-    if not text:
-        logger.error("Nenhum texto extraído; abortando.")
-        return
-
-    chunks = chunk_text(text, max_chars=4000)
-    logger.info(f"Texto dividido em {len(chunks)} chunks.")
-
-    summaries = []
-    for idx, chunk in enumerate(chunks, 1):
-        logger.info(f"Resumindo chunk {idx}/{len(chunks)}…")
-        summaries.append(summarize_chunk(chunk, model=model))
+    _prewarm_model(model)
+    try:
+        summaries = asyncio.run(_summarize_pdf_async(pdf_path, model))
+        if not summaries:
+            logger.error("Nenhum texto extraído; abortando.")
+            return
 
-    logger.info("Sintetizando resumo final…")
-    final_summary = synthesize_summaries(summaries, model=model)
+        logger.info("Sintetizando resumo final…")
+        final_summary = synthesize_summaries(summaries, model=synthesis_model)
+    finally:
+        _unload_model(model)
+        if synthesis_model != model:
+            _unload_model(synthesis_model)
 
     try:
         with open(output_path, "w", encoding="utf-8") as f:
@@ -186,10 +658,22 @@ def main(pdf_path: str, output_path: str, model: str = "gemma3:12b"):
 
 
 if __name__ == "__main__":
-    PDF_FILE = "almeida.pdf"
-    OUT_FILE = "resumo_gpu.md"
+    parser = argparse.ArgumentParser(
+        description="Resume um PDF (OCR via GPU quando necessário).")
+    parser.add_argument("pdf", nargs="?", default="almeida.pdf",
+                        help="PDF de entrada (padrão: almeida.pdf)")
+    parser.add_argument("-o", "--output", default="resumo_gpu.md",
+                        help="arquivo de saída (padrão: resumo_gpu.md)")
+    parser.add_argument(
+        "--model", default=DEFAULT_MODEL,
+        help=f"modelo Ollama para os resumos por chunk (padrão: {DEFAULT_MODEL})")
+    parser.add_argument(
+        "--synthesis-model", default=DEFAULT_SYNTHESIS_MODEL,
+        help=f"modelo Ollama para a síntese final (padrão: {DEFAULT_SYNTHESIS_MODEL})")
+    args = parser.parse_args()
 
     # Garante diretório estático para eventuais dependências
     os.makedirs("static", exist_ok=True)
 
-    main(PDF_FILE, OUT_FILE)
+    main(args.pdf, args.output, model=args.model,
+         synthesis_model=args.synthesis_model)
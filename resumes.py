@@ -1,8 +1,15 @@
 import os
+import re
 import sys
-import fitz          
-import ollama        
-import pytesseract   
+import asyncio
+import concurrent.futures
+import hashlib
+import argparse
+import multiprocessing
+import fitz
+import numpy as np
+import ollama
+import pytesseract
 from PIL import Image
 import time
 import torch
@@ -22,11 +29,112 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# ----------------------------
+# Cliente Ollama compartilhado
+# ----------------------------
+# Um único Client reaproveita o pool de conexões keep-alive do httpx
+# entre todas as requisições, em vez de renegociar conexão a cada chat.
+_OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+_client = ollama.Client(host=_OLLAMA_HOST)
+
+# Modelos padrão: a decodificação é limitada por banda de memória, então
+# a variante q4_K_M praticamente dobra os tokens/s dos resumos por chunk;
+# as sínteses usam q8_0 para preservar a qualidade do texto final.
+DEFAULT_MODEL = "gemma3:27b-it-q4_K_M"
+DEFAULT_SYNTHESIS_MODEL = "gemma3:27b-it-q8_0"
+
+# Mantém o modelo residente entre requisições (renovado a cada chamada);
+# o pré-carregamento usa -1 (fixado) e o descarte explícito usa 0.
+_KEEP_ALIVE = "30m"
+
+
+def _prewarm_model(model: str) -> None:
+    """
+    Força o carregamento do modelo na VRAM antes do primeiro chunk e o
+    fixa (keep_alive=-1), evitando o cold-start de 5-20 s na primeira
+    requisição real — e reaquecendo caso o Ollama o tenha descartado.
+    """
+    try:
+        _client.generate(model=model, prompt="", keep_alive=-1)
+        log(f"Modelo {model} pré-carregado e fixado na VRAM.")
+    except Exception as e:
+        log(f"[Aviso] Falha ao pré-carregar {model}: {e}")
+
+
+def _unload_model(model: str) -> None:
+    """
+    Libera o modelo da VRAM ao fim do pipeline (keep_alive=0).
+    """
+    try:
+        _client.generate(model=model, prompt="", keep_alive=0)
+    except Exception:
+        pass
+
+
 def log(text):
     timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
     print(f"{timestamp} - {text}")
 
 
+# ----------------------------
+# Cache em disco (OCR e texto por PDF)
+# ----------------------------
+_OCR_CACHE_DIR = os.path.join(".cache", "ocr")
+_TEXT_CACHE_DIR = os.path.join(".cache", "text")
+_LLM_CACHE_DIR = os.path.join(".cache", "llm")
+_OCR_LANG = "eng+por"
+# 200 dpi em tons de cinza: mesma acurácia para texto corrido com
+# ~3,4x menos bytes por página do que 300 dpi RGB
+_OCR_DPI = 200
+
+# Incrementar sempre que o texto de algum prompt mudar, para invalidar
+# os resumos cacheados gerados com a versão anterior.
+PROMPT_REV = 2
+
+
+def _cache_read(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _cache_write(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _chat_options(prompt: str, num_predict: int = 384) -> dict:
+    """
+    Opções de geração dimensionadas ao prompt: o num_ctx padrão do
+    Ollama (2048 tokens) truncaria silenciosamente chunks de 4000
+    chars, então o contexto cobre o prompt (~4 chars/token) mais a
+    resposta, com folga; num_predict limita o tamanho da saída, o que
+    encolhe o KV-cache e permite mais requisições simultâneas.
+    """
+    num_ctx = len(prompt) // 4 + num_predict + 256
+    return {
+        "num_ctx": num_ctx,
+        "num_predict": num_predict,
+        "temperature": 0.2,
+        "num_batch": 512,
+    }
+
+
+def _llm_cache_path(prompt: str, model: str) -> str:
+    """
+    Caminho do cache para uma resposta do Ollama: o prompt completo já
+    embute o trecho e o papel de cada etapa, então (prompt, model,
+    PROMPT_REV) identifica a resposta de forma única.
+    """
+    digest = hashlib.sha256(f"{model}|{PROMPT_REV}|{prompt}".encode("utf-8")).hexdigest()
+    return os.path.join(_LLM_CACHE_DIR, f"{digest}.txt")
+
+
 def get_ideal_chunk_size(default: int = 4000) -> int:
     """
     Calcula o tamanho ideal de chunk (em caracteres) baseado na memória da GPU.
@@ -51,27 +159,117 @@ def get_ideal_chunk_size(default: int = 4000) -> int:
         return default
 
 
+def get_ideal_concurrency(default: int = 4) -> int:
+    """
+    Calcula quantos chunks podem ser resumidos em paralelo no Ollama,
+    baseado na memória da GPU (aprox. 1 requisição por 3 GB de VRAM).
+    Limitado pelo OLLAMA_NUM_PARALLEL configurado no servidor.
+    """
+    if not torch.cuda.is_available():
+        return default
+
+    try:
+        props = torch.cuda.get_device_properties(0)
+        total_mem_gb = props.total_memory / (1024 ** 3)
+        ideal = max(1, int(total_mem_gb // 3))
+        num_parallel = int(os.environ.get("OLLAMA_NUM_PARALLEL", "8"))
+        ideal = min(ideal, num_parallel)
+        logger.info(f"Concorrência de resumos definida para {ideal} requisições.")
+        return ideal
+    except Exception as e:
+        logger.error(f"Falha ao obter propriedades da GPU: {e}")
+        return default
+
+
 def extract_text_from_pdf(pdf_path: str) -> str:
     """
     Extrai texto de cada página. Se não houver texto nativo, aplica OCR.
+    As páginas sem texto nativo são rasterizadas em sequência e o OCR
+    (subprocessos do Tesseract) roda em paralelo, uma thread por página.
+    Resultados de OCR são cacheados em disco por hash da imagem da página,
+    e o texto final de cada PDF por hash do arquivo — reexecuções são
+    praticamente gratuitas.
     """
+    with open(pdf_path, "rb") as f:
+        file_bytes = f.read()
+    doc_cache = os.path.join(
+        _TEXT_CACHE_DIR,
+        f"{hashlib.sha256(file_bytes).hexdigest()}_dpi{_OCR_DPI}_{_OCR_LANG}.txt"
+    )
+    cached = _cache_read(doc_cache)
+    if cached is not None:
+        log(f"Texto de {os.path.basename(pdf_path)} recuperado do cache.")
+        return cached
+
     doc = fitz.open(pdf_path)
-    full_text = []
+    texts, pending = _extract_native(doc, pdf_path)
+    texts.update(_ocr_pending(pending, pdf_path))
+
+    result = "\n\n".join(texts[n] for n in sorted(texts))
+    if result:
+        _cache_write(doc_cache, result)
+    return result
+
+
+def _extract_native(doc, pdf_path: str) -> tuple:
+    """
+    1ª etapa (rápida): texto nativo página a página; páginas sem texto
+    viram imagens pendentes de OCR. Retorna ({página: texto},
+    [(página, chave_cache, imagem, pixmap)]).
+    """
+    texts: dict[int, str] = {}
+    pending: List[tuple] = []
 
     for page_num, page in enumerate(doc, start=1):
         text = page.get_text().strip()
         if text:
-            full_text.append(text)
-        else:
-            pix = page.get_pixmap(dpi=300)
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            ocr_text = pytesseract.image_to_string(img, lang="eng+por").strip()
-            if ocr_text:
-                full_text.append(ocr_text)
+            texts[page_num] = text
+            continue
+
+        pix = page.get_pixmap(dpi=_OCR_DPI, colorspace=fitz.csGRAY)
+        # samples_mv é uma visão zero-cópia do buffer interno do pixmap
+        # (pix.samples faria mais uma cópia integral por página)
+        samples = pix.samples_mv
+        key = f"{hashlib.blake2b(samples, digest_size=16).hexdigest()}_{_OCR_LANG}"
+        ocr_cached = _cache_read(os.path.join(_OCR_CACHE_DIR, f"{key}.txt"))
+        if ocr_cached is not None:
+            if ocr_cached:
+                texts[page_num] = ocr_cached
             else:
                 log(f"[Aviso] Página {page_num} sem texto em {os.path.basename(pdf_path)}.")
+            continue
+
+        # Image.fromarray compartilha a memória do array (sem nova
+        # cópia); o pixmap segue na tupla porque o MuPDF libera o
+        # buffer quando o pixmap é coletado
+        img_array = np.frombuffer(samples, dtype=np.uint8).reshape(pix.height, pix.width)
+        pending.append((page_num, key, Image.fromarray(img_array), pix))
+
+    return texts, pending
+
+
+def _ocr_pending(pending: List[tuple], pdf_path: str) -> dict[int, str]:
+    """
+    2ª etapa (lenta): OCR concorrente das páginas pendentes, uma thread
+    por página (subprocessos do Tesseract). Retorna {página: texto} só
+    para as páginas com texto reconhecido.
+    """
+    texts: dict[int, str] = {}
+    if pending:
+        def _ocr_one(item):
+            page_num, key, img, _ = item
+            return page_num, key, pytesseract.image_to_string(img, lang=_OCR_LANG).strip()
+
+        max_workers = min(len(pending), os.cpu_count() or 1)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for page_num, key, ocr_text in pool.map(_ocr_one, pending):
+                _cache_write(os.path.join(_OCR_CACHE_DIR, f"{key}.txt"), ocr_text)
+                if ocr_text:
+                    texts[page_num] = ocr_text
+                else:
+                    log(f"[Aviso] Página {page_num} sem texto em {os.path.basename(pdf_path)}.")
 
-    return "\n\n".join(full_text)
+    return texts
 
 
 def chunk_text(text: str, max_chars: Optional[int] = None) -> List[str]:
@@ -79,40 +277,106 @@ def chunk_text(text: str, max_chars: Optional[int] = None) -> List[str]:
     Divide o texto em pedaços de até max_chars caracteres,
     respeitando quebras de parágrafo.
     Se max_chars for None, usa get_ideal_chunk_size().
+
+    As posições de quebra são coletadas numa única varredura (O(N))
+    sobre o buffer UTF-8 — a busca em bytes usa o memmem vetorizado da
+    libc, bem mais rápido que a varredura sobre str. O limite passa a
+    valer em bytes UTF-8 (aproximadamente o nº de caracteres para texto
+    em português); parágrafos maiores que max_chars são cortados de
+    forma rígida, sem nunca partir um caractere multibyte.
     """
     if max_chars is None:
         max_chars = get_ideal_chunk_size()
 
+    buf = text.encode("utf-8")
     chunks: List[str] = []
-    start = 0
-    length = len(text)
-    while start < length:
-        end = start + max_chars
-        if end < length:
-            split = text.rfind("\n\n", start, end)
-            if split != -1:
-                end = split
-        chunk = text[start:end].strip()
-        if chunk:
-            chunks.append(chunk)
-        start = end
+
+    def append(piece: bytes) -> None:
+        piece = piece.strip()
+        if piece:
+            chunks.append(piece.decode("utf-8"))
+
+    breaks = [m.end() for m in re.finditer(rb"\n\n", buf)] + [len(buf)]
+    cur_start = 0
+    prev = 0
+    for b in breaks:
+        if b - cur_start > max_chars:
+            if prev > cur_start:
+                append(buf[cur_start:prev])
+                cur_start = prev
+            # parágrafo sozinho maior que max_chars → corte rígido
+            while b - cur_start > max_chars:
+                end = cur_start + max_chars
+                # recua até o início do caractere UTF-8 mais próximo
+                while buf[end] & 0xC0 == 0x80:
+                    end -= 1
+                append(buf[cur_start:end])
+                cur_start = end
+        prev = b
+    append(buf[cur_start:])
     return chunks
 
 
-def summarize_chunk(chunk: str, model: str = "gemma3:27b") -> str:
+async def summarize_chunk_async(client: ollama.AsyncClient, chunk: str,
+                                model: str = DEFAULT_MODEL,
+                                semaphore: Optional[asyncio.Semaphore] = None) -> str:
     prompt = (
         "Você é um assistente que resume textos científicos. "
         "Forneça um resumo em português culto, valorizando as ideias principais do trecho abaixo:\n\n"
         f"{chunk}"
     )
-    resp = ollama.chat(
-        model=model,
-        messages=[
-            {"role": "system", "content": "Resuma textos em português."},
-            {"role": "user", "content": prompt}
+    cache_path = _llm_cache_path(prompt, model)
+    cached = _cache_read(cache_path)
+    if cached is not None:
+        return cached
+
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(1)
+    async with semaphore:
+        # stream=True: os tokens são acumulados conforme chegam, em vez
+        # de bloquear a tarefa até o fim da geração
+        stream = await client.chat(
+            model=model,
+            messages=[
+                {"role": "system", "content": "Resuma textos em português."},
+                {"role": "user", "content": prompt}
+            ],
+            stream=True,
+            keep_alive=_KEEP_ALIVE,
+            options=_chat_options(prompt)
+        )
+        buf = []
+        async for part in stream:
+            buf.append(part["message"]["content"])
+    summary = "".join(buf).strip()
+    if summary:
+        _cache_write(cache_path, summary)
+    return summary
+
+
+def summarize_chunks(chunks: List[str], model: str = DEFAULT_MODEL) -> List[str]:
+    """
+    Resume todos os chunks em paralelo via ollama.AsyncClient,
+    despachando uma leva única de requisições concorrentes para o Ollama
+    (requer OLLAMA_NUM_PARALLEL > 1 no servidor para ganho real).
+    """
+    async def _gather() -> List[str]:
+        client = ollama.AsyncClient(host=_OLLAMA_HOST)
+        semaphore = asyncio.Semaphore(get_ideal_concurrency())
+        tasks = [
+            summarize_chunk_async(client, chunk, model=model, semaphore=semaphore)
+            for chunk in chunks
         ]
-    )
-    return resp["message"]["content"].strip()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(_gather())
+    summaries: List[str] = []
+    for i, result in enumerate(results, 1):
+        if isinstance(result, Exception):
+            log(f"[Aviso] Falha ao resumir parte {i}/{len(chunks)}: {result}")
+        elif result:
+            summaries.append(result)
+    return summaries
 
 
 def synthesize_summaries_single(summaries: list[str], model: str) -> str:
@@ -126,47 +390,255 @@ def synthesize_summaries_single(summaries: list[str], model: str) -> str:
         "em língua portuguesa culta, sintetizando as principais contribuições do artigo:\n\n"
         f"{joined}"
     )
-    resp = ollama.chat(
+    cache_path = _llm_cache_path(prompt, model)
+    cached = _cache_read(cache_path)
+    if cached is not None:
+        return cached
+
+    buf = []
+    for part in _client.chat(
         model=model,
         messages=[
             {"role": "system", "content": "Síntese multi-resumos em texto corrido."},
             {"role": "user", "content": prompt}
-        ]
-    )
-    return resp["message"]["content"].strip()
+        ],
+        stream=True,
+        keep_alive=_KEEP_ALIVE,
+        options=_chat_options(prompt, num_predict=1024)
+    ):
+        buf.append(part["message"]["content"])
+    final = "".join(buf).strip()
+    if final:
+        _cache_write(cache_path, final)
+    return final
+
+
+async def _summarize_papers_async(directory: str, pdf_files: List[str],
+                                  model: str) -> dict[str, dict[int, str]]:
+    """
+    Pipeline produtor/consumidor: o produtor extrai texto (OCR incluso,
+    num executor) e emite chunks numa fila; consumidores resumem no
+    Ollama. A extração do próximo artigo se sobrepõe aos resumos do
+    atual, escondendo min(tempo de OCR, tempo de LLM).
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=16)
+    n_consumers = get_ideal_concurrency()
+    client = ollama.AsyncClient(host=_OLLAMA_HOST)
+    semaphore = asyncio.Semaphore(n_consumers)
+    results: dict[str, dict[int, str]] = {}
+
+    async def producer():
+        loop = asyncio.get_running_loop()
+        try:
+            for fname in pdf_files:
+                path = os.path.join(directory, fname)
+                log(f"Processando {fname}...")
+                text = await loop.run_in_executor(None, extract_text_from_pdf, path)
+                if not text:
+                    log(f"Nenhum texto extraído de {fname}.")
+                    continue
+                chunks = list(chunk_text(text))
+                log(f"{fname}: dividido em {len(chunks)} partes.")
+                for i, chunk in enumerate(chunks):
+                    await queue.put((fname, i, chunk))
+        finally:
+            # sentinelas encerram os consumidores
+            for _ in range(n_consumers):
+                await queue.put(None)
+
+    async def consumer():
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            fname, idx, chunk = item
+            try:
+                summary = await summarize_chunk_async(
+                    client, chunk, model=model, semaphore=semaphore)
+            except Exception as e:
+                log(f"[Aviso] Falha ao resumir parte {idx + 1} de {fname}: {e}")
+                summary = ""
+            results.setdefault(fname, {})[idx] = summary
+
+    await asyncio.gather(producer(), *[consumer() for _ in range(n_consumers)])
+    return results
+
+
+def _per_gpu_hosts(n_gpus: int) -> List[str]:
+    """
+    Endereços dos servidores Ollama, um por worker. Usa OLLAMA_HOSTS
+    (lista separada por vírgulas) ou a convenção de uma instância por
+    GPU nas portas 11434, 11435, ... — lançadas previamente com
+    CUDA_VISIBLE_DEVICES apontando para a GPU correspondente.
+    """
+    env = os.environ.get("OLLAMA_HOSTS")
+    if env:
+        return [h.strip() for h in env.split(",") if h.strip()]
+    return [f"http://localhost:{11434 + rank}" for rank in range(n_gpus)]
+
+
+def _worker_init(assignments, model) -> None:
+    """
+    Inicializador de cada worker do pool: reserva uma GPU (via
+    CUDA_VISIBLE_DEVICES) e o servidor Ollama correspondente, já
+    pré-carregando o modelo nessa instância.
+    """
+    global _OLLAMA_HOST, _client
+    rank, host = assignments.get()
+    if torch.cuda.device_count() > 1:
+        os.environ["CUDA_VISIBLE_DEVICES"] = str(rank)
+    os.environ["OLLAMA_HOST"] = host
+    _OLLAMA_HOST = host
+    _client = ollama.Client(host=host)
+    logger.info(f"Worker {rank} usando Ollama em {host}.")
+    _prewarm_model(model)
 
 
-def process_papers(directory: str, model: str = "gemma3:27b") -> dict[str, str]:
+def _process_one_pdf(args) -> tuple:
+    """
+    Fluxo completo de um único PDF (extração → chunks → resumos →
+    síntese do artigo), executado dentro de um worker do pool.
+    """
+    directory, fname, model, synthesis_model = args
+    path = os.path.join(directory, fname)
+    log(f"Processando {fname}...")
+    text = extract_text_from_pdf(path)
+    if not text:
+        log(f"Nenhum texto extraído de {fname}.")
+        return fname, ""
+    chunks = list(chunk_text(text))
+    log(f"{fname}: dividido em {len(chunks)} partes.")
+    article_parts = summarize_chunks(chunks, model=model)
+    if not article_parts:
+        return fname, ""
+    return fname, synthesize_summaries_single(article_parts, synthesis_model)
+
+
+def process_papers(directory: str, model: str = DEFAULT_MODEL,
+                   synthesis_model: str = DEFAULT_SYNTHESIS_MODEL) -> dict[str, str]:
     """
     Lê todos os PDFs em 'directory', extrai texto, chunking e gera resumo para cada artigo.
+    Extração e resumos rodam em pipeline (ver _summarize_papers_async);
+    com várias GPUs (ou vários hosts em OLLAMA_HOSTS), os PDFs são
+    distribuídos entre workers, um por instância do Ollama.
     Retorna dicionário {título: resumo_texto}.
     """
+    pdf_files = [f for f in sorted(os.listdir(directory)) if f.lower().endswith('.pdf')]
+    if not pdf_files:
+        return {}
+
+    n_gpus = torch.cuda.device_count()
+    hosts = _per_gpu_hosts(n_gpus)
+    # cada worker precisa de um host próprio — nunca criar mais workers
+    # do que instâncias do Ollama disponíveis
+    n_workers = min(len(hosts), len(pdf_files))
+    if n_workers > 1:
+        log(f"Distribuindo {len(pdf_files)} PDFs entre {n_workers} workers...")
+        ctx = multiprocessing.get_context("spawn")
+        assignments = ctx.Queue()
+        for rank, host in enumerate(hosts[:n_workers]):
+            assignments.put((rank, host))
+        summaries = {}
+        with ctx.Pool(n_workers, initializer=_worker_init,
+                      initargs=(assignments, model)) as pool:
+            jobs = [(directory, fname, model, synthesis_model) for fname in pdf_files]
+            for fname, summary in pool.imap(_process_one_pdf, jobs):
+                if summary:
+                    summaries[fname.replace('.pdf','')] = summary
+                else:
+                    log(f"Nenhum resumo gerado para {fname}.")
+        return summaries
+
+    parts = asyncio.run(_summarize_papers_async(directory, pdf_files, model))
+
     summaries = {}
-    for fname in sorted(os.listdir(directory)):
-        if fname.lower().endswith('.pdf'):
-            path = os.path.join(directory, fname)
-            log(f"Processando {fname}...")
-            text = extract_text_from_pdf(path)
-            if not text:
-                log(f"Nenhum texto extraído de {fname}.")
-                continue
-            chunks = list(chunk_text(text))
-            log(f"{fname}: dividido em {len(chunks)} partes.")
-            article_parts = []
-            for i, chunk in enumerate(chunks, 1):
-                log(f"{fname}: resumindo parte {i}/{len(chunks)}...")
-                article_parts.append(summarize_chunk(chunk, model=model))
-            summaries[fname.replace('.pdf','')] = synthesize_summaries_single(article_parts, model)
+    for fname in pdf_files:
+        article_parts = [s for _, s in sorted(parts.get(fname, {}).items()) if s]
+        if not article_parts:
+            log(f"Nenhum resumo gerado para {fname}.")
+            continue
+        summaries[fname.replace('.pdf','')] = synthesize_summaries_single(article_parts, synthesis_model)
     return summaries
 
 
-def synthesize_summaries(summaries: dict[str, str], model: str = "gemma3:27b") -> str:
+# Quantos resumos entram em cada nó da redução em árvore da síntese.
+_SYNTHESIS_FANOUT = 8
+
+
+async def _synthesize_group_async(client: ollama.AsyncClient, sections: List[str],
+                                  model: str,
+                                  semaphore: asyncio.Semaphore) -> str:
+    """
+    Nó intermediário da redução em árvore: condensa um grupo de resumos
+    num único texto comparativo, preservando títulos, convergências e
+    divergências para o nível seguinte.
+    """
+    joined = "\n\n".join(sections)
+    prompt = (
+        "Você é um assistente especializado em resumos científicos. "
+        "Condense os resumos de artigos abaixo num único texto corrido, "
+        "em língua portuguesa culta, preservando os títulos citados, as "
+        "principais contribuições e os pontos de convergência e divergência:\n\n"
+        f"{joined}"
+    )
+    cache_path = _llm_cache_path(prompt, model)
+    cached = _cache_read(cache_path)
+    if cached is not None:
+        return cached
+
+    async with semaphore:
+        stream = await client.chat(
+            model=model,
+            messages=[
+                {"role": "system", "content": "Condense resumos em texto corrido."},
+                {"role": "user", "content": prompt}
+            ],
+            stream=True,
+            keep_alive=_KEEP_ALIVE,
+            options=_chat_options(prompt, num_predict=768)
+        )
+        buf = []
+        async for part in stream:
+            buf.append(part["message"]["content"])
+    condensed = "".join(buf).strip()
+    if condensed:
+        _cache_write(cache_path, condensed)
+    return condensed
+
+
+def _reduce_sections(sections: List[str], model: str) -> List[str]:
+    """
+    Executa um nível da redução: sintetiza grupos de _SYNTHESIS_FANOUT
+    resumos em paralelo, devolvendo uma lista len/_SYNTHESIS_FANOUT vezes
+    menor.
+    """
+    groups = [sections[i:i + _SYNTHESIS_FANOUT]
+              for i in range(0, len(sections), _SYNTHESIS_FANOUT)]
+
+    async def _gather() -> List[str]:
+        client = ollama.AsyncClient(host=_OLLAMA_HOST)
+        semaphore = asyncio.Semaphore(get_ideal_concurrency())
+        return await asyncio.gather(
+            *[_synthesize_group_async(client, g, model, semaphore) for g in groups])
+
+    return [s for s in asyncio.run(_gather()) if s]
+
+
+def synthesize_summaries(summaries: dict[str, str], model: str = DEFAULT_SYNTHESIS_MODEL) -> str:
     """
     Gera capítulo de discussão comparativa em texto corrido, sem formatação Markdown.
+    Com muitos artigos, os resumos são reduzidos em árvore (grupos de
+    _SYNTHESIS_FANOUT por nó, O(N log N) tokens no total) até caberem
+    numa única chamada final, evitando estourar o contexto do modelo.
     """
     sections = []
     for title, text in summaries.items():
         sections.append(f"Artigo '{title}':\n{text}")
+
+    while len(sections) > _SYNTHESIS_FANOUT:
+        log(f"Reduzindo {len(sections)} resumos em grupos de {_SYNTHESIS_FANOUT}...")
+        sections = _reduce_sections(sections, model)
+
     combined = "\n\n".join(sections)
 
     prompt = (
@@ -186,29 +658,59 @@ def synthesize_summaries(summaries: dict[str, str], model: str = "gemma3:27b") -
         "Resumos dos artigos:\n"
         f"\n{combined}"
     )
-    resp = ollama.chat(
+    cache_path = _llm_cache_path(prompt, model)
+    cached = _cache_read(cache_path)
+    if cached is not None:
+        return cached
+
+    buf = []
+    for part in _client.chat(
         model=model,
         messages=[
             {"role": "system", "content": "Gere texto corrido comparativo sem usar Markdown."},
             {"role": "user", "content": prompt}
-        ]
-    )
-    return resp["message"]["content"].strip()
+        ],
+        stream=True,
+        keep_alive=_KEEP_ALIVE,
+        options=_chat_options(prompt, num_predict=2048)
+    ):
+        buf.append(part["message"]["content"])
+    chapter = "".join(buf).strip()
+    if chapter:
+        _cache_write(cache_path, chapter)
+    return chapter
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Gera um capítulo comparativo a partir dos PDFs em papers/.")
+    parser.add_argument(
+        "--model", default=DEFAULT_MODEL,
+        help=f"modelo Ollama para os resumos por chunk (padrão: {DEFAULT_MODEL})")
+    parser.add_argument(
+        "--synthesis-model", default=DEFAULT_SYNTHESIS_MODEL,
+        help=f"modelo Ollama para as sínteses (padrão: {DEFAULT_SYNTHESIS_MODEL})")
+    args = parser.parse_args()
+
     os.makedirs("static", exist_ok=True)
     input_dir = "papers"
     output_file = os.path.join("static", "capitulo_comparativo.txt")
 
     log("Iniciando processamento de artigos...")
-    article_summaries = process_papers(input_dir)
-    if not article_summaries:
-        log("Nenhum artigo processado. Abortando.")
-        return
+    _prewarm_model(args.model)
+    try:
+        article_summaries = process_papers(input_dir, model=args.model,
+                                           synthesis_model=args.synthesis_model)
+        if not article_summaries:
+            log("Nenhum artigo processado. Abortando.")
+            return
 
-    log("Gerando capítulo comparativo em texto corrido...")
-    chapter = synthesize_summaries(article_summaries)
+        log("Gerando capítulo comparativo em texto corrido...")
+        chapter = synthesize_summaries(article_summaries, model=args.synthesis_model)
+    finally:
+        _unload_model(args.model)
+        if args.synthesis_model != args.model:
+            _unload_model(args.synthesis_model)
 
     with open(output_file, "w", encoding="utf-8") as f:
         f.write(chapter)